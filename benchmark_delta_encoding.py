@@ -0,0 +1,73 @@
+"""
+Benchmark of the delta encoded observation stream against sending raw and
+zlib compressed frames. Two SimpleAIs play against each other and the
+observations of both perspectives are encoded, decoded and checked for
+lossless reconstruction.
+"""
+import argparse
+import time
+import warnings
+import zlib
+import numpy as np
+
+
+def report(name, sizes, encode_time, decode_time, steps):
+    print("{:<12} {:>10.1f} {:>14.0f} {:>14.0f}".format(
+        name, np.mean(sizes), steps/encode_time if encode_time else float("inf"),
+        steps/decode_time if decode_time else float("inf")))
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    import wimblepong
+    from wimblepong.delta_encoding import DeltaEncoder, DeltaDecoder
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=5000, help="Number of steps to encode")
+    parser.add_argument("--zlib-level", type=int, default=6, help="zlib compression level")
+    args = parser.parse_args()
+
+    env = wimblepong.Wimblepong(opponent=None, visual=True)
+    player = wimblepong.SimpleAi(env, 1)
+    opponent = wimblepong.SimpleAi(env, 2)
+
+    encoders = [DeltaEncoder(), DeltaEncoder()]
+    decoders = [DeltaDecoder(), DeltaDecoder()]
+    sizes = {"raw": [], "zlib": [], "delta": []}
+    times = {"zlib": [0., 0.], "delta": [0., 0.]}
+    obs, keyframe, steps = env.reset(), True, 0
+
+    for _ in range(args.steps):
+        for ob, encoder, decoder in zip(obs, encoders, decoders):
+            sizes["raw"].append(ob.nbytes)
+
+            t = time.perf_counter()
+            packet = zlib.compress(ob.tobytes(), args.zlib_level)
+            times["zlib"][0] += time.perf_counter() - t
+            t = time.perf_counter()
+            np.frombuffer(zlib.decompress(packet), np.uint8).reshape(ob.shape)
+            times["zlib"][1] += time.perf_counter() - t
+            sizes["zlib"].append(len(packet))
+
+            t = time.perf_counter()
+            packet = encoder.encode(ob, keyframe=keyframe)
+            times["delta"][0] += time.perf_counter() - t
+            t = time.perf_counter()
+            decoded = decoder.decode(packet)
+            times["delta"][1] += time.perf_counter() - t
+            sizes["delta"].append(len(packet))
+
+            if not np.array_equal(decoded, ob):
+                raise AssertionError("Lossy reconstruction at step %d" % steps)
+            steps += 1
+
+        obs, _, done, _ = env.step((player.get_action(), opponent.get_action()))
+        keyframe = done
+        if done:
+            obs = env.reset()
+
+    print("Encoded {} observations (both perspectives), all reconstructed exactly".format(steps))
+    print("{:<12} {:>10} {:>14} {:>14}".format("stream", "bytes/ob", "encode ob/s", "decode ob/s"))
+    report("raw", sizes["raw"], 0, 0, steps)
+    report("zlib-%d" % args.zlib_level, sizes["zlib"], *times["zlib"], steps)
+    report("delta", sizes["delta"], *times["delta"], steps)
@@ -0,0 +1,80 @@
+"""
+Benchmark of the time-to-first-step of environment workers forked from the
+EnvForkServer versus fresh processes that import gym and call gym.make
+"""
+import argparse
+import multiprocessing as mp
+import time
+import warnings
+
+
+def fresh_worker(queue, env_name):
+    # Everything a cold worker has to do before it can step: import and make
+    import gym
+    import wimblepong
+    env = gym.make(env_name).unwrapped
+    env.reset()
+    env.step(0)
+    queue.put(True)
+
+
+def bench_fresh(num_workers, env_name):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    start = time.perf_counter()
+    procs = [ctx.Process(target=fresh_worker, args=(queue, env_name))
+             for _ in range(num_workers)]
+    for p in procs:
+        p.start()
+    for _ in range(num_workers):
+        queue.get()
+    elapsed = time.perf_counter() - start
+    for p in procs:
+        p.join()
+    return elapsed
+
+
+def bench_fork_server(server, num_workers, visual):
+    start = time.perf_counter()
+    workers = [server.spawn(visual=visual, opponent=wimblepong.SimpleAi)
+               for _ in range(num_workers)]
+    for worker in workers:
+        worker.step_async(0)
+    for worker in workers:
+        worker.step_wait()
+    elapsed = time.perf_counter() - start
+    for worker in workers:
+        worker.close()
+    return elapsed
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    import wimblepong
+    from wimblepong.fork_server import EnvForkServer
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 16, 128],
+                        help="Numbers of workers to start")
+    parser.add_argument("--state", action="store_true",
+                        help="Use state observations instead of pixels")
+    parser.add_argument("--skip-fresh", action="store_true",
+                        help="Only benchmark the fork server")
+    args = parser.parse_args()
+    visual = not args.state
+    env_name = "WimblepongVisualSimpleAI-v0" if visual else "WimblepongSimpleAI-v0"
+
+    start = time.perf_counter()
+    server = EnvForkServer()
+    print("Fork server warm-up (paid once): {:.3f} s".format(time.perf_counter() - start))
+
+    print("{:>8} {:>14} {:>14} {:>9}".format("workers", "fork server", "gym.make", "speedup"))
+    for n in args.workers:
+        t_fork = bench_fork_server(server, n, visual)
+        if args.skip_fresh:
+            print("{:>8} {:>12.3f} s {:>14} {:>9}".format(n, t_fork, "-", "-"))
+            continue
+        t_fresh = bench_fresh(n, env_name)
+        print("{:>8} {:>12.3f} s {:>12.3f} s {:>8.1f}x".format(n, t_fork, t_fresh,
+                                                           t_fresh/t_fork))
+    server.close()
@@ -0,0 +1,70 @@
+"""
+Benchmark of the self-play opponent pool. Many environments play against a
+pool with two snapshots of a small linear policy on pixel observations. The
+opponent actions are computed either in one batch per snapshot with
+pool.step() or one environment at a time with plain env.step().
+"""
+import argparse
+import time
+import warnings
+import numpy as np
+
+
+class LinearPolicy(object):
+    """
+    Tiny stand-in for a learned policy: the snapshot is the weight matrix
+    of a linear layer on one downsampled color channel, plus a fixed
+    overhead per call (e.g. a GPU launch)
+    """
+    def __init__(self, overhead):
+        self.overhead = overhead
+        self.calls = 0
+
+    def __call__(self, snapshot, observations):
+        self.calls += 1
+        time.sleep(self.overhead)
+        frames = observations[:, ::4, ::4, 1].reshape(len(observations), -1) / 255
+        return np.argmax(frames @ snapshot, axis=1)
+
+
+def run(pool, envs, policy, steps, batched):
+    for env in envs:
+        env.reset()
+    policy.calls = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        if batched:
+            results = pool.step(envs, [0] * len(envs))
+        else:
+            results = [env.step(0) for env in envs]
+        for env, (_, _, done, _) in zip(envs, results):
+            if done:
+                env.reset()
+    elapsed = time.perf_counter() - start
+    return policy.calls / (steps * len(envs)), steps * len(envs) / elapsed
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    import wimblepong
+    from wimblepong.opponent_pool import OpponentPool
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--envs", type=int, help="Number of environments", default=32)
+    parser.add_argument("--steps", type=int, help="Steps per environment", default=100)
+    parser.add_argument("--overhead", type=float, help="Fixed seconds per inference call", default=0.001)
+    args = parser.parse_args()
+
+    policy = LinearPolicy(args.overhead)
+    pool = OpponentPool(policy)
+    for seed in range(2):
+        pool.add_snapshot(np.random.RandomState(seed).randn(50 * 50, 3))
+    envs = [wimblepong.Wimblepong(opponent=pool.opponent(), visual=True)
+            for _ in range(args.envs)]
+
+    print("{} envs, {} steps each, {:.1f} ms overhead per inference call".format(
+        args.envs, args.steps, args.overhead * 1000))
+    print("{:>10} {:>18} {:>10}".format("mode", "calls/env step", "steps/s"))
+    for name, batched in (("env.step", False), ("pool.step", True)):
+        calls, rate = run(pool, envs, policy, args.steps, batched)
+        print("{:>10} {:>18.3f} {:>10.0f}".format(name, calls, rate))
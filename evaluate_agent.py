@@ -0,0 +1,39 @@
+"""
+This is an example on how to evaluate an agent against the SimpleAI with the
+adaptive evaluation harness. The agent follows the ball based on the absolute
+positions in the state observation.
+"""
+import argparse
+import wimblepong
+from wimblepong.evaluation import evaluate
+
+
+class FollowBall(object):
+    def __init__(self, dead_zone=0.02):
+        self.dead_zone = dead_zone
+        self.name = "FollowBall"
+
+    def get_action(self, ob):
+        # ob = (player y, opponent y, ball x, ball y, previous ball x, previous ball y)
+        y_diff = ob[0] - ob[3]
+        if abs(y_diff) < self.dead_zone:
+            return wimblepong.Wimblepong.STAY
+        return wimblepong.Wimblepong.MOVE_UP if y_diff > 0 else wimblepong.Wimblepong.MOVE_DOWN
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--envs", type=int, help="Number of parallel environments", default=8)
+    parser.add_argument("--confidence", type=float, help="Confidence level", default=0.95)
+    parser.add_argument("--margin", type=float, help="Half width of the win rate interval", default=0.05)
+    parser.add_argument("--threshold", type=float, help="Stop once the win rate is known to be above or below", default=None)
+    parser.add_argument("--max-episodes", type=int, help="Maximum number of episodes", default=100000)
+    args = parser.parse_args()
+
+    result = evaluate(FollowBall, num_envs=args.envs, confidence=args.confidence,
+                      margin=args.margin, threshold=args.threshold,
+                      max_episodes=args.max_episodes, verbose=True)
+    print("Win rate {:.3f}, {:.0%} interval [{:.3f}, {:.3f}] after {} episodes "
+          "in {:.1f} s (stopped on {})".format(result["win_rate"], result["confidence"],
+                                                 *result["interval"], result["episodes"],
+                                                 result["wall_time"], result["stopped"]))
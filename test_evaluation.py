@@ -0,0 +1,66 @@
+"""
+Simulates the sequential win rate test of the evaluation harness on
+episodes with a known win rate (without playing any games) and checks that:
+- In margin mode it stops close to the size of a fixed-size evaluation
+- Its intervals contain the true win rate at the requested confidence
+- In threshold mode it stops early for agents that are clearly better
+"""
+import argparse
+import numpy as np
+from wimblepong.evaluation import SequentialWinRateTest, fixed_sample_size
+
+
+def simulate(win_rate, runs, rng, **kwargs):
+    """
+    Run the test on random episodes and return the number of episodes used
+    and whether the final interval contained the win rate, for every run
+    """
+    max_episodes = kwargs.get("max_episodes", 100000)
+    episodes_used, covered = [], []
+    for _ in range(runs):
+        test = SequentialWinRateTest(**kwargs)
+        outcomes = rng.random_sample(max_episodes) < win_rate
+        wins = np.cumsum(outcomes)
+        for episodes in range(1, max_episodes + 1):
+            if test.update(wins[episodes-1], episodes) is not None:
+                break
+        episodes_used.append(episodes)
+        covered.append(test.interval[0] <= win_rate <= test.interval[1])
+    return np.array(episodes_used), np.array(covered)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, help="Simulated evaluations per setting", default=200)
+    parser.add_argument("--confidence", type=float, help="Confidence level", default=0.95)
+    parser.add_argument("--margin", type=float, help="Half width of the interval", default=0.02)
+    parser.add_argument("--seed", type=int, help="Random seed", default=0)
+    args = parser.parse_args()
+    rng = np.random.RandomState(args.seed)
+    # Allowed shortfall of the coverage, about 3 standard errors of the runs
+    slack = 3 * np.sqrt(args.confidence * (1 - args.confidence) / args.runs)
+
+    print("Margin mode, +-{} at {:.0%} confidence, {} runs:".format(
+        args.margin, args.confidence, args.runs))
+    print("{:>9} {:>10} {:>14} {:>10}".format("win rate", "fixed n", "mean episodes", "coverage"))
+    for win_rate in (0.5, 0.6, 0.8):
+        fixed = fixed_sample_size(args.margin, args.confidence, win_rate)
+        used, covered = simulate(win_rate, args.runs, rng, confidence=args.confidence,
+                                 margin=args.margin)
+        print("{:>9.2f} {:>10d} {:>14.0f} {:>10.3f}".format(win_rate, fixed, used.mean(),
+                                                          covered.mean()))
+        assert used.mean() <= 1.1 * fixed, "Margin mode needs too many episodes"
+        assert covered.mean() >= args.confidence - slack, "Coverage too low"
+
+    print("\nThreshold 0.5 and margin +-{}, {} runs:".format(args.margin, args.runs))
+    print("{:>9} {:>10} {:>14} {:>10}".format("win rate", "fixed n", "mean episodes", "coverage"))
+    for win_rate in (0.6, 0.7):
+        fixed = fixed_sample_size(args.margin, args.confidence, win_rate)
+        used, covered = simulate(win_rate, args.runs, rng, confidence=args.confidence,
+                                 margin=args.margin, threshold=0.5)
+        print("{:>9.2f} {:>10d} {:>14.0f} {:>10.3f}".format(win_rate, fixed, used.mean(),
+                                                          covered.mean()))
+        assert used.mean() <= 0.5 * fixed, "Threshold mode does not stop early"
+        assert covered.mean() >= args.confidence - slack, "Coverage too low"
+
+    print("\nThe sequential test stops near the fixed sample size with the requested coverage")
@@ -0,0 +1,171 @@
+"""
+Checks the real-time match driver with agents that are deliberately slow or
+fail, in worker threads and processes:
+- A slow agent misses its deadlines and has late results, a fast one does not
+- The latency histograms agree with the decisions made in time
+- Exceptions in an agent are counted as errors instead of stopping the match
+- A clock faster than the simulation skips ahead instead of catching up
+- Every call to play() reports the statistics of its own steps
+"""
+import argparse
+import random
+import time
+import numpy as np
+import wimblepong
+from wimblepong.realtime import RealtimeMatch
+
+
+class FollowBall(object):
+    """
+    Moves the paddle towards the ball, using state observations
+    """
+    def __init__(self):
+        self.name = "Follow"
+
+    def get_name(self):
+        return self.name
+
+    def get_action(self, ob):
+        # ob = (player y, opponent y, ball x, ball y, previous ball x, previous ball y)
+        y_diff = ob[0] - ob[3]
+        if abs(y_diff) < 0.02:
+            return wimblepong.Wimblepong.STAY
+        return wimblepong.Wimblepong.MOVE_UP if y_diff > 0 else wimblepong.Wimblepong.MOVE_DOWN
+
+
+class SlowAgent(object):
+    """
+    Wraps an agent and sleeps for `delay` seconds in a fraction of the calls
+    """
+    def __init__(self, agent, delay, probability):
+        self.agent = agent
+        self.delay = delay
+        self.probability = probability
+        self.name = "Slow"
+
+    def get_name(self):
+        return self.name
+
+    def get_action(self, ob):
+        if random.random() < self.probability:
+            time.sleep(self.delay)
+        return self.agent.get_action(ob)
+
+
+class FaultyAgent(object):
+    """
+    Wraps an agent and raises an exception in every `every`-th call
+    """
+    def __init__(self, agent, every):
+        self.agent = agent
+        self.every = every
+        self.calls = 0
+        self.name = "Faulty"
+
+    def get_name(self):
+        return self.name
+
+    def get_action(self, ob):
+        self.calls += 1
+        if self.calls % self.every == 0:
+            raise RuntimeError("Deliberate failure in call %d" % self.calls)
+        return self.agent.get_action(ob)
+
+
+def show(title, results):
+    print("\n{}: {} steps in {:.2f} s, {} overruns, score {}".format(
+        title, results["steps"], results["wall_time"], results["overruns"], results["score"]))
+    print("{:>8} {:>10} {:>8} {:>6} {:>7} {:>10} {:>10}".format(
+        "agent", "decisions", "missed", "late", "errors", "p50 [ms]", "max [ms]"))
+    for agent in results["agents"]:
+        print("{:>8} {:>10} {:>8} {:>6} {:>7} {:>10.2f} {:>10.2f}".format(
+            agent["name"], agent["decisions"], agent["missed"], agent["late_results"],
+            agent["errors"], agent.get("latency_p50", np.nan) * 1000,
+            agent.get("latency_max", np.nan) * 1000))
+
+
+def check_histogram(agent):
+    """
+    The results that arrived in time (including errors) have a latency below
+    the deadline, so they must fit between the histogram bins that end
+    before the deadline and the bins that start before it
+    """
+    counts = agent["histogram"]["counts"]
+    edges = agent["histogram"]["bin_edges"]
+    in_time = agent["decisions"] - agent["missed"]
+    below = counts[edges[1:] <= agent["deadline"]].sum()
+    maybe_below = counts[edges[:-1] < agent["deadline"]].sum()
+    assert below <= in_time <= maybe_below, \
+        "%s: %d decisions in time, histogram has %d-%d below the deadline" \
+        % (agent["name"], in_time, below, maybe_below)
+    assert counts.sum() >= in_time + agent["late_results"], agent["name"]
+
+
+def make_env(fps):
+    env = wimblepong.Wimblepong(opponent=None, visual=False)
+    env.fps = fps
+    return env
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fps", type=int, help="Steps per second of the matches", default=120)
+    parser.add_argument("--episodes", type=int, help="Episodes per match", default=2)
+    parser.add_argument("--seed", type=int, help="Random seed", default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    period = 1.0 / args.fps
+
+    # A fast agent against one that sometimes takes 2.5 steps to decide
+    env = make_env(args.fps)
+    slow = SlowAgent(FollowBall(), 2.5 * period, 0.1)
+    results = RealtimeMatch(env, [FollowBall(), slow]).play(args.episodes)
+    show("Thread workers, fast vs slow", results)
+    fast, slow = results["agents"]
+    assert fast["decisions"] == slow["decisions"] == results["steps"]
+    assert fast["missed"] <= 0.01 * fast["decisions"], "The fast agent missed deadlines"
+    assert fast["late_results"] == 0 and fast["errors"] == 0
+    # Every slow decision misses its own deadline and the next two steps,
+    # in which the agent is still busy
+    assert slow["late_results"] > 0, "The slow agent had no late results"
+    assert slow["missed"] >= 2 * slow["late_results"], "Too few missed deadlines"
+    assert slow["missed"] <= 0.5 * slow["decisions"], "Too many missed deadlines"
+    for agent in results["agents"]:
+        check_histogram(agent)
+
+    # Agent processes, one of which raises an exception every 10 calls
+    env = make_env(args.fps)
+    faulty = FaultyAgent(FollowBall(), 10)
+    results = RealtimeMatch(env, [FollowBall(), faulty], executor="process").play(args.episodes)
+    show("Process workers, fast vs faulty", results)
+    fast, faulty = results["agents"]
+    assert fast["errors"] == 0
+    # The agent is called once per step unless it missed a deadline
+    calls = faulty["decisions"] - faulty["missed"] + faulty["late_results"]
+    assert abs(faulty["errors"] - calls // 10) <= 1, \
+        "Expected about %d errors, got %d" % (calls // 10, faulty["errors"])
+    for agent in results["agents"]:
+        check_histogram(agent)
+
+    # A clock the simulation cannot keep up with: every step overruns and the
+    # match skips ahead instead of stalling
+    env = make_env(20000)
+    results = RealtimeMatch(env, [FollowBall(), FollowBall()], deadline=0.005).play(1)
+    show("Thread workers at 20000 fps", results)
+    assert results["overruns"] > 0.5 * results["steps"], "Expected the clock to overrun"
+
+    # At the normal clock rate the match runs in real time, and playing the
+    # same match again starts new statistics
+    env = make_env(args.fps)
+    match = RealtimeMatch(env, [FollowBall(), FollowBall()])
+    for _ in range(2):
+        results = match.play(1)
+        show("Thread workers at {} fps".format(args.fps), results)
+        expected = results["steps"] * period
+        assert abs(results["wall_time"] - expected) < 0.1 * expected + 0.05, \
+            "Match took %.2f s instead of %.2f s" % (results["wall_time"], expected)
+        for agent in results["agents"]:
+            assert agent["decisions"] == results["steps"], agent["name"]
+
+    print("\nDeadlines, late results, errors and histograms are consistent")
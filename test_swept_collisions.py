@@ -0,0 +1,172 @@
+"""
+Compares the swept collision engines with the original per-frame engine:
+- swept: the per-frame engine plus a swept check of the ball's motion in
+every frame (env.swept_collisions)
+- coarse: one swept integration of the ball per step (env.coarse_timestep)
+The script fires the ball straight at a paddle at increasing speeds and
+counts how often each engine reflects it instead of letting it tunnel
+through. Then it lets two SimpleAIs and an agent against the built-in
+SimpleAI play with every engine and checks that win rates, episode and
+rally lengths agree with the per-frame engine.
+"""
+import argparse
+import math
+import random
+import time
+import numpy as np
+import wimblepong
+
+
+def make_env(engine, frameskip, opponent=None):
+    env = wimblepong.Wimblepong(opponent=opponent, visual=False)
+    env.swept_collisions = engine == "swept"
+    env.coarse_timestep = engine == "coarse"
+    env.frameskip = frameskip
+    return env
+
+
+def fire_at_paddle(env, speed_mul, offset):
+    """
+    Shoot the ball horizontally at player 1's paddle and return True if the
+    paddle reflects it
+    """
+    env.reset()
+    ball = env.ball
+    ball.speed_mul = speed_mul
+    # Randomize where the ball is in its per-frame motion when it reaches
+    # the paddle
+    speed = 6 * speed_mul
+    ball.x = env.GAME_AREA_RESOLUTION[0] // 2 + random.uniform(0, speed)
+    ball.y = env.player1.y + offset
+    ball.vector = (-speed, 0)
+    ball.update_rect()
+    done = False
+    while not done and ball.last_touch != 1:
+        _, _, done, _ = env.step((env.STAY, env.STAY))
+    return ball.last_touch == 1
+
+
+class FollowBall(object):
+    # Agent that moves its paddle towards the ball, using state observations
+    def get_action(self, ob):
+        # ob = (player y, opponent y, ball x, ball y, previous ball x, previous ball y)
+        y_diff = ob[0] - ob[3]
+        if abs(y_diff) < 0.02:
+            return wimblepong.Wimblepong.STAY
+        return wimblepong.Wimblepong.MOVE_UP if y_diff > 0 else wimblepong.Wimblepong.MOVE_DOWN
+
+
+class CountingSimpleAi(wimblepong.SimpleAi):
+    # Built-in opponent that counts how often the environment asks it
+    calls = 0
+
+    def get_action(self, ob=None):
+        CountingSimpleAi.calls += 1
+        return super().get_action(ob)
+
+
+def play(env, episodes, seed, player=None):
+    """
+    Play the episodes and return per episode win (of the player on the left),
+    steps and paddle hits, plus the steps per second. In multiplayer mode two
+    SimpleAIs play, otherwise player plays against the built-in opponent.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    if env.opponent is None:
+        players = (wimblepong.SimpleAi(env, 1), wimblepong.SimpleAi(env, 2))
+    wins, steps, hits = [], [], []
+    total_steps = 0
+    start = time.perf_counter()
+    for _ in range(episodes):
+        ob = env.reset()
+        done = False
+        last_touch = 0
+        steps.append(0)
+        hits.append(0)
+        while not done:
+            if env.opponent is None:
+                _, (reward, _), done, _ = env.step(tuple(p.get_action() for p in players))
+            else:
+                ob, reward, done, _ = env.step(player.get_action(ob))
+            steps[-1] += 1
+            if env.ball.last_touch != last_touch:
+                hits[-1] += 1
+                last_touch = env.ball.last_touch
+        wins.append(reward == 10)
+        total_steps += steps[-1]
+    elapsed = time.perf_counter() - start
+    return np.array(wins), np.array(steps), np.array(hits), total_steps / elapsed
+
+
+def compare(name, a, b, tolerance):
+    """
+    Check that the means of the per episode samples a and b agree within
+    tolerance standard errors of their difference
+    """
+    stderr = math.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+    diff = b.mean() - a.mean()
+    ok = abs(diff) <= tolerance * max(stderr, 1e-9)
+    print("{:>10} {:>12.3f} {:>12.3f} {:>+10.2f} sigma {}".format(
+        name, a.mean(), b.mean(), diff / max(stderr, 1e-9), "ok" if ok else "DIFFERENT"))
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, help="Episodes per engine and match", default=300)
+    parser.add_argument("--frameskip", type=int, help="Frames per step", default=3)
+    parser.add_argument("--seed", type=int, help="Random seed", default=0)
+    parser.add_argument("--tolerance", type=float, help="Allowed difference in standard errors", default=4)
+    args = parser.parse_args()
+
+    engines = ("per-frame", "swept", "coarse")
+
+    print("Ball fired at the paddle, reflected shots out of 21 offsets:")
+    print("{:>10} {:>12} {:>12} {:>12}".format("speed_mul", *engines))
+    offsets = range(-10, 11)
+    tunneled = []
+    for speed_mul in (0.42, 1.0, 1.5, 2.0, 3.0, 5.0):
+        counts = []
+        for engine in engines:
+            env = make_env(engine, args.frameskip)
+            counts.append(sum(fire_at_paddle(env, speed_mul, o) for o in offsets))
+            if engine != "per-frame" and counts[-1] < len(offsets):
+                tunneled.append(engine)
+        print("{:>10.2f} {:>12d} {:>12d} {:>12d}".format(speed_mul, *counts))
+
+    # Both engines should play the same game. Compare quantities that do not
+    # agree by symmetry alone: episode lengths, rally lengths and the win rate
+    # of an agent against the built-in opponent
+    mismatched = []
+    matches = {"SimpleAI vs SimpleAI": None, "FollowBall vs built-in SimpleAI": FollowBall}
+    for title, agent in matches.items():
+        print("\n{}, {} episodes, frameskip {}:".format(title, args.episodes, args.frameskip))
+        results = {}
+        for engine in engines:
+            env = make_env(engine, args.frameskip,
+                           opponent=None if agent is None else CountingSimpleAi)
+            CountingSimpleAi.calls = 0
+            player = None if agent is None else agent()
+            results[engine] = play(env, args.episodes, args.seed, player)
+            if agent is not None:
+                calls = CountingSimpleAi.calls / results[engine][1].sum()
+                print("{:>10}: {:.2f} opponent calls per step, {:.0f} steps/s".format(
+                    engine, calls, results[engine][3]))
+            else:
+                print("{:>10}: {:.0f} steps/s".format(engine, results[engine][3]))
+        for engine in engines[1:]:
+            print("{:>10} {:>12} {:>12} {:>16}".format("", engines[0], engine, "difference"))
+            for i, quantity in enumerate(("P1 WR", "steps/ep", "hits/ep")):
+                if not compare(quantity, results[engines[0]][i].astype(float),
+                               results[engine][i].astype(float), args.tolerance):
+                    mismatched.append(engine)
+
+    if tunneled:
+        raise AssertionError("Engines that let the ball tunnel through a paddle: %s"
+                             % ", ".join(sorted(set(tunneled))))
+    if mismatched:
+        raise AssertionError("Outcomes that differ from the per-frame engine by more than "
+                             "%g standard errors: %s" % (args.tolerance,
+                                                         ", ".join(sorted(set(mismatched)))))
+    print("\nNo tunneling with swept collisions and matching outcomes")
@@ -0,0 +1,149 @@
+import struct
+import zlib
+import numpy as np
+
+
+KEYFRAME, DELTA = b"K", b"D"
+REGION = struct.Struct("<HHHH")     # y, x, height, width of a changed region
+
+
+def _as_image(observation):
+    # View any observation as a (height, width, channels) array so that state
+    # observations go through the same code path as frames
+    observation = np.ascontiguousarray(observation)
+    if observation.ndim == 1:
+        return observation.reshape(1, -1, 1)
+    if observation.ndim == 2:
+        return observation[..., None]
+    return observation
+
+
+def _runs(flags):
+    # Start and stop indices of the runs of consecutive True values
+    padded = np.concatenate(([False], flags, [False]))
+    return np.flatnonzero(padded[1:] != padded[:-1]).reshape(-1, 2)
+
+
+def _changed_regions(previous, current):
+    """
+    Find the bounding boxes of the regions that differ between two frames.
+    Between two steps only the ball and the paddles move, so this gives a
+    handful of small rectangles.
+    """
+    changed = previous != current
+    regions = []
+    # Split into bands of changed rows, then into runs of changed columns
+    # within each band and finally shrink the rows to those that changed
+    for y0, y1 in _runs(changed.reshape(len(changed), -1).any(axis=1)):
+        for x0, x1 in _runs(changed[y0:y1].any(axis=0).any(axis=1)):
+            rows = np.flatnonzero(changed[y0:y1, x0:x1].reshape(y1-y0, -1).any(axis=1))
+            regions.append((y0+rows[0], x0, rows[-1]-rows[0]+1, x1-x0))
+    return regions
+
+
+class DeltaEncoder(object):
+    """
+    Encodes a stream of observations into packets that contain either the
+    whole (zlib compressed) observation or only the regions that changed
+    since the previous packet. Use one encoder per observation stream, i.e.
+    per player perspective.
+    """
+    def __init__(self, compress_level=1):
+        self.compress_level = compress_level
+        self.previous = None
+
+    def reset(self):
+        # Forget the previous frame so the next packet is a keyframe
+        self.previous = None
+
+    def encode(self, observation, keyframe=False):
+        """
+        Encode an observation as returned by step() or reset().
+
+        ARGUMENTS:
+        - np.array, observation: The observation to encode
+        - bool, keyframe: Send the full observation, e.g. after env.reset()
+
+        RETURN:
+        - bytes: packet to be decoded by DeltaDecoder
+        """
+        current = _as_image(observation)
+        if keyframe or self.previous is None \
+                or self.previous.shape != current.shape \
+                or self.previous.dtype != current.dtype:
+            packet = self._encode_keyframe(observation, current)
+        else:
+            packet = self._encode_delta(current)
+        self.previous = current.copy()
+        return packet
+
+    def _encode_keyframe(self, observation, current):
+        observation = np.asarray(observation)
+        dtype = observation.dtype.str.encode()
+        header = struct.pack("<B%dsB" % len(dtype), len(dtype), dtype,
+                             observation.ndim)
+        header += struct.pack("<%dI" % observation.ndim, *observation.shape)
+        return KEYFRAME + header + zlib.compress(current.tobytes(),
+                                                 self.compress_level)
+
+    def _encode_delta(self, current):
+        regions = _changed_regions(self.previous, current)
+        chunks = [struct.pack("<H", len(regions))]
+        for y, x, h, w in regions:
+            chunks.append(REGION.pack(y, x, h, w))
+            chunks.append(current[y:y+h, x:x+w].tobytes())
+        return DELTA + zlib.compress(b"".join(chunks), self.compress_level)
+
+
+class DeltaDecoder(object):
+    """
+    Reconstructs the exact observations from packets of a DeltaEncoder
+    """
+    def __init__(self):
+        self.frame = None
+        self.shape = None
+
+    def reset(self):
+        self.frame = None
+        self.shape = None
+
+    def decode(self, packet):
+        """
+        Decode one packet and return a copy of the reconstructed observation
+        """
+        kind, body = packet[:1], memoryview(packet)[1:]
+        if kind == KEYFRAME:
+            self._decode_keyframe(body)
+        elif kind == DELTA:
+            if self.frame is None:
+                raise ValueError("Received a delta packet before any keyframe")
+            self._decode_delta(body)
+        else:
+            raise ValueError("Unknown packet type: %s" % kind)
+        return self.frame.reshape(self.shape).copy()
+
+    def _decode_keyframe(self, body):
+        dtype_len = body[0]
+        offset = 1 + dtype_len
+        dtype = np.dtype(bytes(body[1:offset]).decode())
+        ndim = body[offset]
+        offset += 1
+        shape = struct.unpack_from("<%dI" % ndim, body, offset)
+        offset += 4 * ndim
+        data = zlib.decompress(body[offset:])
+        self.shape = shape
+        self.frame = _as_image(np.frombuffer(data, dtype).reshape(shape)).copy()
+
+    def _decode_delta(self, body):
+        body = zlib.decompress(body)
+        count, = struct.unpack_from("<H", body, 0)
+        offset = 2
+        channels = self.frame.shape[2]
+        itemsize = self.frame.dtype.itemsize
+        for _ in range(count):
+            y, x, h, w = REGION.unpack_from(body, offset)
+            offset += REGION.size
+            size = h * w * channels * itemsize
+            patch = np.frombuffer(body[offset:offset+size], self.frame.dtype)
+            self.frame[y:y+h, x:x+w] = patch.reshape(h, w, channels)
+            offset += size
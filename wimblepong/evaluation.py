@@ -0,0 +1,164 @@
+import math
+import time
+from statistics import NormalDist
+from wimblepong.simple_ai import SimpleAi
+from wimblepong.fork_server import EnvForkServer
+
+
+def wilson_interval(wins, episodes, alpha):
+    """
+    Wilson score interval of the win rate at confidence level 1-alpha
+    """
+    if episodes == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    p = wins / episodes
+    denom = 1 + z**2 / episodes
+    center = (p + z**2 / (2 * episodes)) / denom
+    half = z * math.sqrt(p * (1 - p) / episodes + z**2 / (4 * episodes**2)) / denom
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+
+def fixed_sample_size(margin, confidence=0.95, win_rate=0.5):
+    """
+    Episodes a fixed-size evaluation needs for an interval of +-margin
+    """
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    return int(math.ceil(z**2 * win_rate * (1 - win_rate) / margin**2))
+
+
+class SequentialWinRateTest(object):
+    """
+    Sequential test for the win rate with two ways to stop:
+    - margin: the interval is at most +-margin wide. This only depends on
+    the width of the interval, not on where it lies, so like the fixed-width
+    intervals of Chow and Robbins the nominal confidence holds (for all but
+    tiny margins) and the test stops close to fixed_sample_size()
+    - threshold: the interval excludes the threshold. This is tested at a
+    bounded number of geometrically spaced looks up to max_episodes, with the
+    error probability split evenly over them
+
+    When both are enabled, each gets half of the error probability.
+
+    ARGUMENTS:
+    - float, confidence: Confidence level of the interval
+    - float, margin: Stop once the interval is at most +-margin wide
+    - float, threshold: Also stop once the interval excludes this win rate
+    (e.g. 0.5 to decide if an agent beats its opponent), None to disable
+    - int, min_episodes: Episodes before the test may stop
+    - int, max_episodes: Last episode the threshold is tested at
+    - float, growth: Factor by which the episodes grow between threshold looks
+    """
+    def __init__(self, confidence=0.95, margin=0.02, threshold=None,
+                 min_episodes=30, max_episodes=100000, growth=1.5):
+        alpha = 1 - confidence
+        self.margin = margin
+        self.threshold = threshold
+        self.min_episodes = min_episodes
+        self.threshold_looks = []
+        episodes = min_episodes
+        while episodes < max_episodes:
+            self.threshold_looks.append(episodes)
+            episodes = max(int(math.ceil(episodes * growth)), episodes + 1)
+        self.threshold_looks.append(max_episodes)
+        if threshold is None:
+            self.margin_alpha = alpha
+        else:
+            self.margin_alpha = alpha / 2
+            self.threshold_alpha = alpha / 2 / len(self.threshold_looks)
+        self.looks = 0
+        self.interval = (0.0, 1.0)
+
+    def update(self, wins, episodes):
+        """
+        Returns the reason to stop ("margin" or "threshold") or None to continue
+        """
+        self.interval = wilson_interval(wins, episodes, self.margin_alpha)
+        if episodes < self.min_episodes:
+            return None
+        low, high = self.interval
+        if (high - low) / 2 <= self.margin:
+            return "margin"
+        if self.threshold is not None and self.looks < len(self.threshold_looks) \
+                and episodes >= self.threshold_looks[self.looks]:
+            self.looks += 1
+            low, high = wilson_interval(wins, episodes, self.threshold_alpha)
+            if low > self.threshold or high < self.threshold:
+                self.interval = low, high
+                return "threshold"
+        return None
+
+
+def evaluate(make_agent, opponent=SimpleAi, num_envs=8, confidence=0.95,
+             margin=0.02, threshold=None, max_episodes=100000, switch_every=1,
+             visual=False, server=None, verbose=False):
+    """
+    Estimate the win rate of an agent in parallel headless environments,
+    stopping as soon as the sequential test has resolved it.
+
+    ARGUMENTS:
+    - callable, make_agent: Returns a new agent with get_action(ob) (and
+    optionally reset()); one agent is made per environment
+    - class, opponent: Opponent class played against, SimpleAi by default
+    - int, num_envs: Number of environments played in parallel
+    - float, confidence, margin, threshold: See SequentialWinRateTest
+    - int, max_episodes: Stop after this many episodes in any case
+    - int, switch_every: Switch sides every this many episodes per environment
+    - bool, visual: Pixel or state observations
+    - EnvForkServer, server: Fork server to spawn the environments from,
+    a new one is started if None
+
+    RETURN:
+    - dict: win rate, its interval, wins, episodes used, wall time and the
+    reason to stop ("margin", "threshold" or "max_episodes")
+    """
+    start = time.perf_counter()
+    test = SequentialWinRateTest(confidence, margin, threshold,
+                                 max_episodes=max_episodes)
+    own_server = server is None
+    if own_server:
+        server = EnvForkServer()
+    envs = []
+    try:
+        envs = [server.spawn(visual=visual, opponent=opponent) for _ in range(num_envs)]
+        agents = [make_agent() for _ in range(num_envs)]
+        obs = [env.reset() for env in envs]
+        episode_counts = [0] * num_envs
+        wins, episodes, stopped = 0, 0, None
+
+        while stopped is None:
+            for env, agent, ob in zip(envs, agents, obs):
+                env.step_async(agent.get_action(ob))
+            for i, (env, agent) in enumerate(zip(envs, agents)):
+                obs[i], reward, done, _ = env.step_wait()
+                # Episodes still being played when the test stops are not counted
+                if not done or stopped is not None:
+                    continue
+                # Every episode is a single point, won or lost
+                wins += reward > 0
+                episodes += 1
+                episode_counts[i] += 1
+                if episode_counts[i] % switch_every == 0:
+                    env.switch_sides()
+                obs[i] = env.reset()
+                if hasattr(agent, "reset"):
+                    agent.reset()
+
+                stopped = test.update(wins, episodes)
+                if stopped is None and episodes >= max_episodes:
+                    stopped = "max_episodes"
+                if verbose and episodes % 100 == 0:
+                    print("{} episodes, win rate {:.3f}".format(episodes, wins/episodes))
+    finally:
+        for env in envs:
+            env.close()
+        if own_server:
+            server.close()
+
+    return {"win_rate": wins / episodes if episodes else float("nan"),
+            "interval": test.interval,
+            "confidence": confidence,
+            "wins": wins,
+            "episodes": episodes,
+            "wall_time": time.perf_counter() - start,
+            "stopped": stopped}
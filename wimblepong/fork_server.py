@@ -0,0 +1,262 @@
+import os
+import random
+import signal
+import traceback
+import multiprocessing as mp
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+import numpy as np
+from wimblepong.wimblepong import Wimblepong
+
+
+# Environment methods a worker is allowed to call on behalf of the client
+WORKER_COMMANDS = ("reset", "step", "switch_sides", "set_names")
+
+
+def _reseed(seed=None):
+    # Forked workers inherit the random state of the template, so every worker
+    # would otherwise see the exact same sequence of ball launches
+    if seed is None:
+        seed = int.from_bytes(os.urandom(4), "little")
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def _configure(env, visual=True, opponent=None, names=(None, None),
+               frameskip=3, seed=None):
+    # Turn the (copy-on-write) template into the requested environment
+    _reseed(seed)
+    env.visual = visual
+    env._set_observation_space()
+    # Drop the names of the template before the opponent sets its own
+    env.player1.name = "Nameless"
+    env.player2.name = "Nameless"
+    env.set_opponent(opponent)
+    # set_names assigns the player's name even if it is None in single mode
+    p1, p2 = names
+    if opponent is None:
+        env.set_names(p1, p2)
+    elif p1 is not None:
+        env.set_names(p1)
+    env.frameskip = frameskip
+
+
+def _run_worker(conn, env):
+    """
+    Serve environment calls from the client until it closes the connection
+    """
+    while True:
+        try:
+            cmd, args = conn.recv()
+        except EOFError:
+            break
+        if cmd == "close":
+            conn.send(("ok", None))
+            break
+        if cmd not in WORKER_COMMANDS:
+            conn.send(("error", "Unknown command: %s" % cmd))
+            continue
+        try:
+            result = getattr(env, cmd)(*args)
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+            continue
+        conn.send(("ok", result))
+    conn.close()
+
+
+def _serve(control, template_kwargs):
+    """
+    Main loop of the fork server process. Builds the template environment once
+    and forks a configured worker for every spawn request.
+    """
+    # Let the kernel reap finished workers, we never wait for them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    # Pay for the imports, the font and the background once
+    template = Wimblepong(**template_kwargs)
+    template.reset()
+    control.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            msg = control.recv()
+        except EOFError:
+            break
+        if msg[0] == "shutdown":
+            break
+        elif msg[0] == "spawn":
+            config = msg[1]
+            fd = reduction.recv_handle(control)
+            try:
+                pid = os.fork()
+            except OSError:
+                os.close(fd)
+                control.send(("error", traceback.format_exc()))
+                continue
+            if pid == 0:
+                # Worker process; the template is shared copy-on-write
+                exit_code = 0
+                try:
+                    control.close()
+                    conn = Connection(fd)
+                    try:
+                        _configure(template, **config)
+                        template.reset()
+                    except Exception:
+                        conn.send(("error", traceback.format_exc()))
+                        raise
+                    conn.send(("ok", None))
+                    _run_worker(conn, template)
+                except BaseException:
+                    traceback.print_exc()
+                    exit_code = 1
+                finally:
+                    os._exit(exit_code)
+            os.close(fd)
+            control.send(("spawned", pid))
+    control.close()
+
+
+class EnvWorker(object):
+    """
+    Client side handle of an environment running in a forked worker process.
+    Mirrors the Wimblepong interface; step_async/step_wait allow stepping
+    many workers in parallel.
+    """
+    def __init__(self, conn, pid, config):
+        self.conn = conn
+        self.pid = pid
+        self.config = config
+        self.closed = False
+
+    def _call(self, cmd, *args):
+        self._send(cmd, *args)
+        return self._recv()
+
+    def _send(self, cmd, *args):
+        if self.closed:
+            raise RuntimeError("Worker %d is already closed" % self.pid)
+        self.conn.send((cmd, args))
+
+    def _recv(self):
+        status, result = self.conn.recv()
+        if status == "error":
+            raise RuntimeError("Worker %d failed:\n%s" % (self.pid, result))
+        return result
+
+    def reset(self):
+        return self._call("reset")
+
+    def step(self, actions):
+        return self._call("step", actions)
+
+    def step_async(self, actions):
+        self._send("step", actions)
+
+    def step_wait(self):
+        return self._recv()
+
+    def switch_sides(self):
+        return self._call("switch_sides")
+
+    def set_names(self, p1=None, p2=None):
+        return self._call("set_names", p1, p2)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._call("close")
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            pass
+        self.conn.close()
+        self.closed = True
+
+
+class EnvForkServer(object):
+    """
+    Fork server that imports wimblepong and constructs a template Wimblepong
+    once, then forks configured environment workers from it in milliseconds.
+
+    ARGUMENTS:
+    - dict, template_kwargs: Constructor arguments of the template environment
+    - str, start_method: How the server process itself is started. "spawn"
+    gives a clean server that does not share any state of the calling process
+    """
+    def __init__(self, template_kwargs=None, start_method="spawn"):
+        if template_kwargs is None:
+            template_kwargs = {"opponent": None, "visual": True}
+        ctx = mp.get_context(start_method)
+        self.control, server_control = ctx.Pipe(duplex=True)
+        self.process = ctx.Process(target=_serve,
+                                   args=(server_control, template_kwargs),
+                                   daemon=True)
+        self.process.start()
+        server_control.close()
+        self.workers = []
+        # Block until the template is built so that spawn() is always fast
+        status, self.server_pid = self.control.recv()
+        if status != "ready":
+            raise RuntimeError("Fork server failed to start")
+
+    def spawn(self, visual=True, opponent=None, names=(None, None),
+              frameskip=3, seed=None):
+        """
+        Fork a new environment worker from the template.
+
+        ARGUMENTS:
+        - bool, visual: Pixel or state observations
+        - class, opponent: Opponent class (e.g. SimpleAi) or None for multiplayer
+        - tuple, names: Player names passed to set_names. Against an opponent
+        only the agent's name (the first) can be given
+        - int or tuple, frameskip: Frameskip of the environment
+        - int, seed: Seed for the worker's random generators (random if None)
+
+        RETURN:
+        - EnvWorker: handle to the reset environment
+        """
+        names = tuple(names)
+        if opponent is not None and names[1] is not None:
+            raise ValueError("The opponent names itself, only the agent's name "
+                             "can be given: %s" % str(names))
+        config = {"visual": visual, "opponent": opponent, "names": names,
+                  "frameskip": frameskip, "seed": seed}
+        conn, worker_conn = mp.Pipe(duplex=True)
+        self.control.send(("spawn", config))
+        reduction.send_handle(self.control, worker_conn.fileno(), self.server_pid)
+        status, result = self.control.recv()
+        worker_conn.close()
+        if status != "spawned":
+            conn.close()
+            raise RuntimeError("Fork server failed to spawn a worker:\n%s" % result)
+        worker = EnvWorker(conn, result, config)
+        # The worker reports once it is configured and reset
+        try:
+            worker._recv()
+        except EOFError:
+            conn.close()
+            raise RuntimeError("Worker %d exited while starting" % worker.pid)
+        except RuntimeError:
+            conn.close()
+            raise
+        self.workers.append(worker)
+        return worker
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+        if self.process.is_alive():
+            try:
+                self.control.send(("shutdown",))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.process.join()
+        self.control.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,141 @@
+import random
+import weakref
+from collections import defaultdict
+from functools import partial
+import numpy as np
+
+
+def uniform_sampler(snapshots):
+    # Play against any of the snapshots with equal probability
+    return random.randrange(len(snapshots))
+
+
+def latest_sampler(snapshots):
+    # Always play against the newest snapshot
+    return len(snapshots) - 1
+
+
+def recent_sampler(window):
+    """
+    Returns a sampler that picks uniformly among the `window` newest snapshots
+    """
+    def sampler(snapshots):
+        return random.randrange(max(len(snapshots) - window, 0), len(snapshots))
+    return sampler
+
+
+class PoolOpponent(object):
+    """
+    Opponent that gets its actions from an OpponentPool. Created by the
+    environment through the class returned by OpponentPool.opponent().
+    """
+    def __init__(self, pool, env, player_id=2):
+        self.pool = pool
+        self.env = env
+        self.player_id = player_id
+        self.snapshot_id = None
+        self.action = None
+        self.name = pool.name
+        pool._register(self)
+        self.reset()
+
+    def get_name(self):
+        return self.name
+
+    def get_action(self, ob=None):
+        # The action is normally computed in a batch by the pool before the
+        # environment steps; fall back to a batch of one otherwise. Either way
+        # it is kept for all frames of the step.
+        if self.action is None:
+            self.pool.compute_actions([self])
+        return self.action
+
+    def end_step(self):
+        # Called by the environment at the end of step(), the action was only
+        # valid for this step
+        self.action = None
+
+    def get_observation(self):
+        # Mirrored observation, as if this opponent was playing on the left
+        return self.env._get_observation(self.player_id)
+
+    def reset(self):
+        # Pick a new snapshot to play with for the next episode
+        self.action = None
+        if self.pool.resample_on_reset or self.snapshot_id is None:
+            self.snapshot_id = self.pool.sample()
+
+
+class OpponentPool(object):
+    """
+    Pool of policy snapshots for self-play. The opponents of many environments
+    register with the pool and compute_actions() evaluates all of them with
+    one call to the inference function per snapshot.
+
+    ARGUMENTS:
+    - callable, inference: inference(snapshot, observations) receives a
+    snapshot and the stacked observations of all opponents playing with it
+    and returns an array with one action per observation
+    - callable, sampler: sampler(snapshots) returns the index of the snapshot
+    a new episode is played with (uniform_sampler by default)
+    - bool, resample_on_reset: Sample a new snapshot on every env.reset()
+    - str, name: Name of the opponents shown on the scoreboard
+    """
+    def __init__(self, inference, sampler=uniform_sampler, resample_on_reset=True,
+                 name="SelfPlay"):
+        self.inference = inference
+        self.sampler = sampler
+        self.resample_on_reset = resample_on_reset
+        self.name = name
+        self.snapshots = []
+        self.opponents = weakref.WeakSet()
+
+    def add_snapshot(self, snapshot):
+        """
+        Add a policy snapshot (e.g. a checkpoint or parameters) to the pool
+        """
+        self.snapshots.append(snapshot)
+
+    def sample(self):
+        if not self.snapshots:
+            raise ValueError("The opponent pool is empty, add a snapshot first")
+        return self.sampler(self.snapshots)
+
+    def opponent(self):
+        """
+        Returns the opponent class to pass as opponent= to Wimblepong
+        """
+        return partial(PoolOpponent, self)
+
+    def _register(self, opponent):
+        self.opponents.add(opponent)
+
+    def compute_actions(self, opponents=None):
+        """
+        Compute the next action of the given (by default all registered)
+        opponents, batching the observations by snapshot
+        """
+        if opponents is None:
+            opponents = list(self.opponents)
+        batches = defaultdict(list)
+        for opponent in opponents:
+            batches[opponent.snapshot_id].append(opponent)
+        for snapshot_id, batch in batches.items():
+            observations = np.stack([op.get_observation() for op in batch])
+            actions = self.inference(self.snapshots[snapshot_id], observations)
+            for opponent, action in zip(batch, actions):
+                opponent.action = int(action)
+
+    def step(self, envs, actions):
+        """
+        Compute the opponent actions of all envs in one batch and step them
+
+        ARGUMENTS:
+        - list, envs: Wimblepong environments playing against this pool
+        - list, actions: The action of the player in each environment
+
+        RETURN:
+        - list of (observation, reward, done, info) tuples
+        """
+        self.compute_actions([env.opponent for env in envs])
+        return [env.step(action) for env, action in zip(envs, actions)]
@@ -0,0 +1,276 @@
+import queue
+import threading
+import time
+import traceback
+import multiprocessing as mp
+import numpy as np
+from wimblepong.wimblepong import Wimblepong
+
+
+# Latency histogram bin edges in seconds: 0, 0.1ms ... 1s (log spaced), inf
+LATENCY_BINS = np.concatenate(([0], np.geomspace(1e-4, 1, 41), [np.inf]))
+
+
+class _ThreadWorker(object):
+    """
+    Computes the agent's decisions in a background thread
+    """
+    def __init__(self, agent):
+        self.agent = agent
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            ob = self.requests.get()
+            if ob is None:
+                break
+            try:
+                action, failed = self.agent.get_action(ob), False
+            except Exception:
+                traceback.print_exc()
+                action, failed = None, True
+            self.results.put((action, failed))
+
+    def submit(self, ob):
+        self.requests.put(ob)
+
+    def poll(self, timeout):
+        try:
+            return self.results.get(timeout=timeout) if timeout > 0 \
+                else self.results.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.requests.put(None)
+
+
+def _process_worker(conn, agent):
+    while True:
+        try:
+            ob = conn.recv()
+        except EOFError:
+            break
+        if ob is None:
+            break
+        try:
+            action, failed = agent.get_action(ob), False
+        except Exception:
+            traceback.print_exc()
+            action, failed = None, True
+        conn.send((action, failed))
+    conn.close()
+
+
+class _ProcessWorker(object):
+    """
+    Computes the agent's decisions in a separate process. The process is
+    forked, so it starts with a copy of the agent and its state.
+    """
+    def __init__(self, agent, start_method="fork"):
+        ctx = mp.get_context(start_method)
+        self.conn, worker_conn = ctx.Pipe(duplex=True)
+        self.process = ctx.Process(target=_process_worker, args=(worker_conn, agent),
+                                   daemon=True)
+        self.process.start()
+        worker_conn.close()
+
+    def submit(self, ob):
+        self.conn.send(ob)
+
+    def poll(self, timeout):
+        if self.conn.poll(max(timeout, 0)):
+            return self.conn.recv()
+        return None
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class _AgentStats(object):
+    # Decision bookkeeping of one agent
+    def __init__(self, name, deadline):
+        self.name = name
+        self.deadline = deadline
+        self.decisions = 0
+        self.missed = 0
+        self.late = 0
+        self.errors = 0
+        self.latencies = []
+
+    def summary(self):
+        latencies = np.array(self.latencies)
+        counts, edges = np.histogram(latencies, bins=LATENCY_BINS)
+        summary = {"name": self.name, "deadline": self.deadline,
+                   "decisions": self.decisions, "missed": self.missed,
+                   "late_results": self.late,
+                   "errors": self.errors,
+                   "histogram": {"counts": counts, "bin_edges": edges}}
+        if len(latencies):
+            summary.update({"latency_mean": latencies.mean(),
+                            "latency_p50": np.percentile(latencies, 50),
+                            "latency_p99": np.percentile(latencies, 99),
+                            "latency_max": latencies.max()})
+        return summary
+
+
+class RealtimeMatch(object):
+    """
+    Runs a match on a fixed clock of env.fps steps per second. Every step each
+    agent gets the current observation and has until its deadline to decide;
+    agents that miss it (or raise an exception) play STAY and the late
+    decision is discarded. The agents compute in worker threads (or
+    processes) so that a slow agent cannot stall the game.
+
+    ARGUMENTS:
+    - Wimblepong, env: The environment, in multiplayer mode with two agents or
+    against a built-in opponent with one agent
+    - list, agents: Agents with a get_action(ob) function, player 1 first
+    - float or list, deadline: Seconds per decision for all or for each agent,
+    half of the step period by default
+    - str, executor: "thread" or "process" ("process" forks a copy of every
+    agent, so it requires agents that do not need to access the environment
+    and leaves the state of the original agents unchanged)
+    - bool, render: Render the game every step
+    """
+    def __init__(self, env, agents, deadline=None, executor="thread", render=False):
+        env = env.unwrapped
+        if type(env) is not Wimblepong:
+            raise TypeError("RealtimeMatch can only run Wimblepong")
+        expected = 2 if env.opponent is None else 1
+        if len(agents) != expected:
+            raise ValueError("Expected %d agents, got %d" % (expected, len(agents)))
+        if executor not in ("thread", "process"):
+            raise ValueError("Invalid executor: %s" % executor)
+        self.env = env
+        self.agents = agents
+        self.period = 1.0 / env.fps
+        if deadline is None:
+            deadline = self.period / 2
+        if np.isscalar(deadline):
+            deadline = [deadline] * len(agents)
+        self.deadlines = list(deadline)
+        self.executor = executor
+        self.render = render
+
+        names = [agent.get_name() if hasattr(agent, "get_name") else "Agent %d" % (i+1)
+                 for i, agent in enumerate(agents)]
+        self.env.set_names(*names)
+        self.names = names
+
+    def _observations(self, ob):
+        return ob if len(self.agents) == 2 else (ob,)
+
+    def _decide(self, workers, stats, pending, obs):
+        """
+        Request decisions for the current observations and collect the ones
+        that arrive before the deadlines. Deadlines and latencies count from
+        the moment the observation is handed to the agent until the decision
+        is back in the match.
+        """
+        actions = []
+        for i, (worker, agent_stats) in enumerate(zip(workers, stats)):
+            # Collect a decision that missed an earlier deadline
+            if pending[i] is not None:
+                result = worker.poll(0)
+                if result is not None:
+                    agent_stats.latencies.append(time.perf_counter() - pending[i])
+                    agent_stats.late += 1
+                    agent_stats.errors += result[1]
+                    pending[i] = None
+            # Only one decision at a time, a busy agent misses this step
+            if pending[i] is None:
+                pending[i] = time.perf_counter()
+                worker.submit(obs[i])
+
+        for i, (worker, agent_stats) in enumerate(zip(workers, stats)):
+            agent_stats.decisions += 1
+            action = self.env.STAY
+            result = None
+            if pending[i] is not None:
+                timeout = pending[i] + self.deadlines[i] - time.perf_counter()
+                result = worker.poll(timeout)
+            if result is not None:
+                action, failed = result
+                latency = time.perf_counter() - pending[i]
+                agent_stats.latencies.append(latency)
+                pending[i] = None
+                agent_stats.errors += failed
+                if latency > self.deadlines[i]:
+                    # Arrived while we were waiting for another agent, or is
+                    # the decision for the observation of an earlier step
+                    action = self.env.STAY
+                    agent_stats.missed += 1
+                elif failed:
+                    # The agent raised an exception, play STAY instead
+                    action = self.env.STAY
+            else:
+                agent_stats.missed += 1
+            actions.append(action)
+        return actions
+
+    def play(self, episodes=21):
+        """
+        Play the given number of episodes (points) in real time.
+
+        RETURN:
+        - dict: final score, number of steps, steps in which the simulation
+        itself could not keep up with the clock and per agent decision
+        counts, missed deadlines, errors and latency statistics and histograms,
+        all of them for this call only
+        """
+        stats = [_AgentStats(name, d) for name, d in zip(self.names, self.deadlines)]
+        if self.executor == "thread":
+            workers = [_ThreadWorker(agent) for agent in self.agents]
+        else:
+            workers = [_ProcessWorker(agent) for agent in self.agents]
+        pending = [None] * len(workers)
+        steps, overruns = 0, 0
+        start = time.perf_counter()
+        try:
+            obs = self._observations(self.env.reset())
+            next_tick = time.perf_counter()
+            for _ in range(episodes):
+                done = False
+                while not done:
+                    actions = self._decide(workers, stats, pending, obs)
+                    if len(actions) == 1:
+                        ob, _, done, _ = self.env.step(actions[0])
+                    else:
+                        ob, _, done, _ = self.env.step(tuple(actions))
+                    if self.render:
+                        self.env.render()
+                    steps += 1
+                    if done:
+                        ob = self.env.reset()
+                    obs = self._observations(ob)
+
+                    # Wait for the next tick; if the step took too long, skip
+                    # ahead instead of trying to catch up
+                    next_tick += self.period
+                    now = time.perf_counter()
+                    if now > next_tick:
+                        overruns += 1
+                        next_tick = now
+                    else:
+                        time.sleep(next_tick - now)
+        finally:
+            for worker in workers:
+                worker.close()
+
+        return {"score": (self.env.player1.score, self.env.player2.score),
+                "episodes": episodes,
+                "steps": steps,
+                "overruns": overruns,
+                "wall_time": time.perf_counter() - start,
+                "agents": [agent_stats.summary() for agent_stats in stats]}
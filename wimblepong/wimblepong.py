@@ -39,6 +39,32 @@ class Rect(object):
             colliding = rect.collide_rect_vertices(self)
         return colliding
 
+    def sweep(self, rect, dx, dy):
+        """
+        Swept collision check: computes when self, moving by dx and dy,
+        starts to overlap with the static rectangle rect.
+
+        RETURN:
+        - float or None: fraction of the motion in [0, 1) at which the
+        rectangles touch, None if they do not collide during the motion
+        """
+        t_entry, t_exit = 0.0, 1.0
+        for pos, size, d, rect_pos, rect_size in ((self.x, self.w, dx, rect.x, rect.w),
+                                                  (self.y, self.h, dy, rect.y, rect.h)):
+            # The rectangles overlap on this axis while lo < d*t < hi
+            lo = rect_pos - (pos + size)
+            hi = rect_pos + rect_size - pos
+            if d == 0:
+                if lo >= 0 or hi <= 0:
+                    return None
+                continue
+            t0, t1 = sorted((lo / d, hi / d))
+            t_entry = max(t_entry, t0)
+            t_exit = min(t_exit, t1)
+            if t_entry >= t_exit:
+                return None
+        return t_entry
+
     def draw_on(self, array):
         # Function to draw the rectangle onto an array given at its position
         # with width and height
@@ -230,6 +256,11 @@ class Wimblepong(gym.core.Env):
         self.action_space = gym.spaces.Discrete(3)      # Define a discrete action
                                                         # space with 3 possible actions
         self.frameskip = 3
+        self.swept_collisions = False                   # Find ball collisions along
+                                                        # its motion in each frame
+        self.coarse_timestep = False                    # Move the ball once per step
+                                                        # with swept collisions instead
+                                                        # of once per frame
 
         # Load scoreboard font
         self.scoreboard_font = self.load_font()
@@ -249,15 +280,26 @@ class Wimblepong(gym.core.Env):
         # If an agent does not use visual mode it gets the absolute positions of
         # each player and the ball.
         self.visual = visual
-        if visual:
-            self.observation_space = gym.spaces.Box(low=0, high=255, shape=\
-                    (y_arena_res, x_arena_res, 3), dtype=np.uint8)
-        else:
-            self.observation_space = gym.spaces.Box(low=-1, high=1, shape=(6,))
+        self._set_observation_space()
 
         # If opponent is None, switch to multiplayer mode. Two agents are playing.
         # Otherwise grab P2 action from the opponent. One agent is playing against
         # for example a bot in singleplayer mode.
+        self.set_opponent(opponent)
+
+    def _set_observation_space(self):
+        if self.visual:
+            self.observation_space = gym.spaces.Box(low=0, high=255, shape=\
+                    (self.GAME_AREA_RESOLUTION[1], self.GAME_AREA_RESOLUTION[0], 3),
+                    dtype=np.uint8)
+        else:
+            self.observation_space = gym.spaces.Box(low=-1, high=1, shape=(6,))
+
+    def set_opponent(self, opponent=None):
+        """
+        Instantiate the opponent class (or switch to multiplayer mode if None)
+        and show its name on the scoreboard
+        """
         if opponent is None:
             self.opponent = None
         else:
@@ -330,10 +372,165 @@ class Wimblepong(gym.core.Env):
         if p2_collide and self.ball.last_touch is not 2:
             self._reflect(self.player2)
 
+    def _step_forward_swept(self, actions):
+        """
+        Advance the game by one frame like _step_forward, but also find the
+        collisions along the ball's motion in the frame so that it cannot
+        tunnel through the paddles, no matter how fast it is.
+        """
+        self._step_actions(actions)
+        self._step_collisions()
+        self._step_swept_collisions()
+        player1_reward, player2_reward, done = self._step_check_victory()
+        return player1_reward, player2_reward, done
+
+    def _step_swept_collisions(self):
+        """
+        Reflect the ball at the exact contact point if it would pass through
+        a paddle during this frame. Collisions that _step_collisions detects at
+        the start of the next frame are left to it, so that the game does not
+        change at speeds at which the ball cannot tunnel. The walls do not need
+        this, Ball.move reflects the ball before it reaches them.
+        """
+        ball = self.ball
+        dx, dy = ball.vector
+        for player in (self.player1, self.player2):
+            if ball.last_touch == player.player_number:
+                continue
+            t = ball.rect.sweep(player.rect, dx, dy)
+            if t is None:
+                continue
+            end = Rect(ball.rect.x + dx, ball.rect.y + dy, ball.w, ball.h)
+            if player.rect.collide_rect(end):
+                continue
+            # Move to the contact point and reflect. Ball.move then moves the
+            # ball by a whole frame, so start it back by the time already used
+            ball.x += dx * t
+            ball.y += dy * t
+            self._reflect(player)
+            ball.x -= ball.vector[0] * t
+            ball.y -= ball.vector[1] * t
+            ball.update_rect()
+            break
+
+    def _step_forward_coarse(self, actions, num_steps):
+        """
+        Advance the game by num_steps frames with a single integration of the
+        ball. The opponent decides and the paddles move frame by frame, then
+        the ball is swept along its whole motion against the walls and the
+        paddles of every frame, so it cannot tunnel through them.
+        """
+        ball = self.ball
+        x, y = ball.x, ball.y
+        paddles = []
+        for frame in range(num_steps):
+            # Let the opponent see the ball where it would be in this frame
+            # (ignoring bounces), it only moves at the end of the step
+            ball.x = x + ball.vector[0] * frame
+            ball.y = y + ball.vector[1] * frame
+            self._step_actions(actions)
+            paddles.append((self.player1.rect, self.player2.rect))
+        ball.x, ball.y = x, y
+        winner, done = self._sweep_ball(paddles)
+        return self._step_rewards(winner, done)
+
+    def _sweep_ball(self, paddles):
+        """
+        Move the ball for len(paddles) frames, reflecting it off the walls and
+        paddles where they are hit. Returns the winner and if the game is over.
+
+        The per-frame engine only notices a contact after the ball has moved:
+        Ball.move turns the ball around up to one frame short of the walls and
+        _step_collisions reflects it up to one frame deep inside a paddle, in
+        the next step if the ball got there late in this one. The contacts here
+        are placed half a frame of motion from the walls and paddles, where
+        they happen on average, and the paddles are checked from half a frame
+        before the step until half a frame before its end, so that both
+        engines play the same game.
+        """
+        ball = self.ball
+        num_frames = len(paddles)
+        time = 0.0
+        since = -0.5                # Start of the motion checked for paddles
+        winner, done = 0, False
+
+        # Every iteration moves the ball to the next contact; the ball touches
+        # each paddle at most once and the walls only a few times per step
+        for _ in range(16):
+            vx, vy = ball.vector
+            t_hit, hit, paddle_y = num_frames, None, None
+
+            top = self.SCOREBOARD_HEIGHT + ball.h//2 + abs(vy) / 2
+            bottom = self.GAME_AREA_RESOLUTION[1] + self.SCOREBOARD_HEIGHT - ball.h//2 - abs(vy) / 2
+            if vy < 0 and ball.y + vy * (t_hit - time) < top:
+                t_hit, hit = time + max((top - ball.y) / vy, 0), "wall"
+            elif vy > 0 and ball.y + vy * (t_hit - time) > bottom:
+                t_hit, hit = time + max((bottom - ball.y) / vy, 0), "wall"
+            left_goal = 0 - ball.w//2
+            right_goal = self.GAME_AREA_RESOLUTION[0] - ball.w//2
+            if vx < 0 and ball.x + vx * (t_hit - time) <= left_goal:
+                t_hit, hit = time + max((left_goal - ball.x) / vx, 0), 2
+            elif vx > 0 and ball.x + vx * (t_hit - time) >= right_goal:
+                t_hit, hit = time + max((right_goal - ball.x) / vx, 0), 1
+
+            for i, player in enumerate((self.player1, self.player2)):
+                if ball.last_touch == player.player_number:
+                    continue
+                # The paddles only move vertically, skip them if the ball
+                # stays clear of them horizontally
+                rect = paddles[0][i]
+                x_start = ball.rect.x + vx * (since - time)
+                x_end = ball.rect.x + vx * (t_hit - time)
+                if max(x_start, x_end) + ball.w <= rect.x \
+                        or min(x_start, x_end) >= rect.x + rect.w:
+                    continue
+                depth = min(abs(vx) / 2, rect.w)
+                for frame, frame_paddles in enumerate(paddles):
+                    # The paddle of a frame is the one the ball is checked
+                    # against within half a frame of its start
+                    start = max(since, frame - 0.5)
+                    end = min(t_hit, frame + 0.5, num_frames - 0.5)
+                    if start >= end:
+                        continue
+                    rect = frame_paddles[i]
+                    x = rect.x + depth if player.player_number == 2 else rect.x
+                    target = Rect(x, rect.y, rect.w - depth, rect.h)
+                    moving = Rect(ball.rect.x + vx * (start - time),
+                                  ball.rect.y + vy * (start - time), ball.w, ball.h)
+                    t = moving.sweep(target, vx * (end - start), vy * (end - start))
+                    if t is not None:
+                        # A contact late in the last step is handled now, where
+                        # the ball is
+                        t_hit = max(start + t * (end - start), time)
+                        hit, paddle_y = player, rect.y + rect.h / 2
+                        break
+
+            ball.x += vx * (t_hit - time)
+            ball.y += vy * (t_hit - time)
+            ball.update_rect()
+            time = since = t_hit
+            if hit is None:
+                break
+            elif hit == "wall":
+                ball.vector = (vx, -1 * vy)
+            elif isinstance(hit, Player):
+                self._reflect(hit, paddle_y)
+                ball.update_rect()
+            else:
+                winner, done = hit, True
+                break
+
+        # Keep the meaning of the previous position: one frame ago
+        ball.previous_x = ball.x - ball.vector[0]
+        ball.previous_y = ball.y - ball.vector[1]
+        return winner, done
+
     def _step_check_victory(self):
         # Move ball and check if game is over
         winner, done = self.ball.move()
+        return self._step_rewards(winner, done)
 
+    def _step_rewards(self, winner, done):
         # Compute rewards if the episode is over
         player1_reward = 0
         player2_reward = 0
@@ -396,10 +593,19 @@ class Wimblepong(gym.core.Env):
         else:
             num_steps = np.random.randint(self.frameskip[0], self.frameskip[1])
 
-        for _ in range(num_steps):
-            p1_reward, p2_reward, done = self._step_forward(actions)
-            if done:
-                break
+        if self.coarse_timestep:
+            p1_reward, p2_reward, done = self._step_forward_coarse(actions, num_steps)
+        else:
+            step_forward = self._step_forward_swept if self.swept_collisions \
+                           else self._step_forward
+            for _ in range(num_steps):
+                p1_reward, p2_reward, done = step_forward(actions)
+                if done:
+                    break
+
+        # Let opponents that decide once per step know that the step is over
+        if self.opponent is not None and hasattr(self.opponent, "end_step"):
+            self.opponent.end_step()
 
         self._step_render_frame()
         ob, reward = self._step_get_state(p1_reward, p2_reward)
@@ -415,6 +621,8 @@ class Wimblepong(gym.core.Env):
         self.ball.reset_ball()
         self.player1.reset()
         self.player2.reset()
+        if self.opponent is not None and hasattr(self.opponent, "reset"):
+            self.opponent.reset()
 
         # Draw the changes so they are in the frame
         self._render_player1()
@@ -437,13 +645,16 @@ class Wimblepong(gym.core.Env):
         """
         self.screen = self.background.copy()
 
-    def _reflect(self, player):
+    def _reflect(self, player, paddle_y=None):
         """
         This function computes in which direction the ball has to reflected and
-        updates the last_touch variable
+        updates the last_touch variable. paddle_y is the paddle position at the
+        time of the contact if the paddle has moved on since.
         """
-        offcenter = abs(player.y - self.ball.y)
-        if player.y > self.ball.y:
+        if paddle_y is None:
+            paddle_y = player.y
+        offcenter = abs(paddle_y - self.ball.y)
+        if paddle_y > self.ball.y:
             if player.player_number == 1:
                 direction = 1
             else: